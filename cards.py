@@ -14,6 +14,10 @@ SUITS = set(['H', 'D', 'C', 'S'])
 # Char representations of rank including numbers and Jack, Queen, King, Ace
 RANKS = set(['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K'])
 
+# Each card has its own bit, used for fast hand evaluation. With ranks
+# numbered from 0 for '2' up to 12 for 'A', the bit is 4 * rank + suit index.
+SUIT_INDEX = {'S': 0, 'H': 1, 'D': 2, 'C': 3}
+
 # At this point, only 5 Card Draw is available
 NUM_CARDS_IN_HAND = 5
 MAX_DISCARD = 3
@@ -31,15 +35,24 @@ class Deck:
         '''
         self.deck = []
         self.create()
+        self.all_cards = tuple(self.deck)  # kept so reset can reuse the cards
         self.shuffle()
 
     def create(self):
         '''
         Builds a 52 card deck from scratch.
         '''
+        append = self.deck.append
         for suit in SUITS:
             for rank in RANKS:
-                self.deck.append(Card(suit, rank))
+                append(Card(suit, rank))
+
+    def reset(self):
+        '''
+        Puts every card back in the deck and shuffles it.
+        '''
+        self.deck[:] = self.all_cards
+        self.shuffle()
 
     def shuffle(self):
         '''
@@ -56,6 +69,26 @@ class Deck:
 
         return self.deck.pop()
 
+    def deal_cards(self, num_cards):
+        '''
+        Removes and returns the given number of cards from the top of the deck
+        as a list. Raises a DeckEmptyError if there are not enough cards left,
+        or a ValueError if the number is negative.
+
+        num_cards: int - the number of cards to deal
+        '''
+        if num_cards < 0:
+            raise ValueError('cannot deal a negative number of cards')
+        if num_cards > len(self.deck):
+            raise DeckEmptyError()
+        if num_cards == 0:
+            return []
+
+        # The top of the deck is the end of the list
+        card_list = self.deck[-num_cards:]
+        del self.deck[-num_cards:]
+        return card_list
+
     def add_card_to_bottom(self, card):
         '''
         Adds the given card to the bottom of the deck. The card can not be
@@ -126,6 +159,9 @@ class Card:
         if self.rank == '2':
             self.value = 2
 
+        # Bit unique to this card for hand evaluation
+        self.mask = 1 << (4 * (self.value - 2) + SUIT_INDEX[suit])
+
         # Assign UTF suit also
         if suit == 'H':
             self.utf_suit = '♥'    # U+2665
@@ -166,14 +202,31 @@ class Hand:
     Hand represents a hand of cards that a poker player might have.
     '''
 
-    def __init__(self, num_cards):
+    def __init__(self, num_cards, initial=None):
         '''
-        Creates an empty hand.
+        Creates a hand, empty unless initial cards are given. If there are more
+        initial cards than the hand can hold, raises a HandFullError.
 
         num_cards: int - the number of cards a hand should contain
+        initial: [Card] - Optional, the cards to start the hand with
         '''
         self.max_len = num_cards
-        self.hand = []
+        self.hand = list(initial) if initial else []
+        if len(self.hand) > self.max_len:
+            raise HandFullError()
+
+    def set_cards(self, card_list):
+        '''
+        Replaces the cards in the hand with the given cards, so the hand can be
+        reused. If there are more cards than the hand can hold, raises a
+        HandFullError.
+
+        card_list: [Card] - the cards the hand should hold
+        '''
+        if len(card_list) > self.max_len:
+            raise HandFullError()
+
+        self.hand[:] = card_list
 
     def add_card(self, card):
         '''
@@ -205,6 +258,30 @@ class Hand:
         self.hand.remove(card)
         return card
 
+    def remove_cards(self, card_ids):
+        '''
+        Removes the cards with the given indexes from the hand in one pass. The
+        indexes are 1-indexed, as in remove_card. A repeated index removes its
+        card once. The removed cards are returned in hand order.
+
+        card_ids: [int] - the 1-indexed positions of the cards to remove
+        '''
+        num_cards = len(self.hand)
+        to_remove = set(card_ids)
+        for card_id in to_remove:
+            if not 0 < card_id <= num_cards:
+                raise ValueError('card_id must be a valid index (1 to 5)')
+
+        removed = []
+        kept = []
+        for i, card in enumerate(self.hand, 1):
+            if i in to_remove:
+                removed.append(card)
+            else:
+                kept.append(card)
+        self.hand[:] = kept
+        return removed
+
     def swap_cards(self, card_id_1, card_id_2):
         '''
         Swaps two cards in a hand as one would do with a real hand of cards.
@@ -221,6 +298,16 @@ class Hand:
         j = card_id_2 - 1
         self.hand[i], self.hand[j] = self.hand[j], self.hand[i]
 
+    def get_key(self):
+        '''
+        Returns an integer identifying the set of cards in the hand, regardless
+        of their order.
+        '''
+        key = 0
+        for card in self.hand:
+            key |= card.mask
+        return key
+
     def print_hand(self):
         '''
         Displays each card in the hand along with its ID number.
@@ -5,7 +5,28 @@ viewed in Google Docs here:
 https://docs.google.com/document/d/1p03ydY3g0QY7WARs0TSkFAcQ-Ut0rUP-xKc40t47tTs/edit?usp=sharing
 '''
 
+from collections import Counter
+from dataclasses import dataclass
+import queue
+import threading
+
 import cards
+import hand_eval
+
+
+@dataclass(frozen=True, slots=True)
+class GameConfig:
+    '''
+    The settings a game is started with. They do not change during the game.
+
+    num_players: int - Number of players in the game. Min: 2, Max: 5
+    wallet_amt: int - Initial amount of money in each player's wallet.
+    ante_amt: int - The amount each player needs to ante per round.
+    '''
+    num_players: int
+    wallet_amt: int
+    ante_amt: int
+
 
 class GameStateManager:
     '''
@@ -14,6 +35,16 @@ class GameStateManager:
     before using these methods.
     '''
 
+    # Attributes are fixed, so skip the per-instance __dict__
+    __slots__ = (
+        'cfg', 'deck',
+        'player_addrs', 'player_names', 'player_conns', 'player_senders',
+        'active_senders',
+        'active_mask',
+        'final_hands', 'hand_keys', 'hand_pool', 'win_score', 'hand_features',
+        'next_id', 'bets', 'turn_id', 'next_turn', 'folded_mask'
+    )
+
     def __init__(self, num_players, wallet_amt, ante_amt):
         '''
         Creates the GameManager.
@@ -23,12 +54,6 @@ class GameStateManager:
                           Basically, the buy in amount. Min: 5
         ante_amt: int - The amount each player needs to ante per round.
         '''
-        # Simple constants
-        # Player info
-        self.p_addr_key = 'addr'
-        self.p_name_key = 'name'
-        self.p_conn_key = 'conn'
-
         # Game specific set up
         self.start(num_players, wallet_amt, ante_amt)
 
@@ -45,18 +70,28 @@ class GameStateManager:
                           Basically, the buy in amount. Min: 5
         ante_amt: int - The amount each player needs to ante per round.
         '''
-        self.num_players = num_players
-        self.wallet_amt = wallet_amt
-        self.ante_amt = ante_amt
+        self.cfg = GameConfig(num_players, wallet_amt, ante_amt)
         self.deck = cards.Deck()
-        self.players = dict()
-        self.final_hands = dict()
+
+        # Player info, stored as parallel arrays indexed by player ID - 1
+        self.player_addrs = [None] * num_players
+        self.player_names = [None] * num_players
+        self.player_conns = [None] * num_players
+        self.player_senders = [None] * num_players  # SendWorker per player
+        self.active_senders = ()  # senders of the players in the game
+        self.active_mask = 0  # bit (ID - 1) is set while that player is in the game
+
+        self.final_hands = [None] * num_players  # indexed by player ID - 1
+        self.hand_keys = [0] * num_players  # Hand.get_key() of each final hand
+        self.hand_pool = []  # Hands from earlier rounds, reused by store_hand
+        self.win_score = [[] for _ in range(10)]  # players in each score bucket
         self.next_id = 1  # incremented when players join
-        self.bets = BetInfo()
+        self.bets = BetInfo(num_players)
         self.turn_id = 1  # ID of the player who's turn it is
-        self.folded_ids = set()  # IDs of players who have folded during betting
-        self.left_ids = set()
-        self.card_val = {} # record the number of cards for each player
+        self.next_turn = [0] * num_players  # ID playing after each ID, or 0
+        # Bit (player ID - 1) is set for players who have folded during betting
+        self.folded_mask = 0
+        self.hand_features = [None] * num_players # HandFeatures of each player's hand
 
     def join(self, connection, address_tup, player_name=''):
         '''
@@ -74,36 +109,54 @@ class GameStateManager:
         # server API for join. The server can extract the address tuple from
         # the client message, but it has to be passed in here.
 
-        if self.next_id > self.num_players:
+        if self.next_id > self.cfg.num_players:
             raise GameFullError(
                 'designated number of players reached, game full')
 
-        # Get ID and increment
-        p_id = self.next_id
+        # Get index and increment
+        idx = self.next_id - 1
         self.next_id += 1
 
-        # Create a player as a dict
-        player = {
-            self.p_addr_key: address_tup,
-            self.p_name_key: player_name,
-            self.p_conn_key: connection
-        }
+        # Store the player in its slot
+        self.player_addrs[idx] = address_tup
+        self.player_names[idx] = player_name
+        self.player_conns[idx] = connection
+        self.active_mask |= 1 << idx
+        sender = SendWorker(connection)
+        self.player_senders[idx] = sender
+        self.active_senders += (sender,)
+        self.bets.add_player(idx + 1)
+        self.link_turn_order()
 
-        # Add to the players group
-        self.players[p_id] = player
-
-        return p_id
+        return idx + 1
 
     def notify_all(self, message):
         '''
         Sends the given message to all players in the game. Keywords need to 
         be included by the caller if they are needed.
 
-        message: str - A message to send to every player.
+        message: str|bytes - A message to send to every player. Bytes are
+                             sent as they are.
+        '''
+        # Same bytes for everyone, so only encode once
+        payload = message.encode() if isinstance(message, str) else message
+        for sender in self.active_senders:
+            sender.send(payload)
+
+    def notify_many(self, player_ids, message):
+        '''
+        Sends the given message to each of the given players. Keywords need to
+        be included by the caller if they are needed.
+
+        player_ids: [int] - The IDs of the players.
+        message: str|bytes - A message to send to the players. Bytes are
+                             sent as they are.
         '''
-        for p_id in self.players:
-            conn = self.players[p_id][self.p_conn_key]
-            conn.send(message.encode())
+        payload = message.encode() if isinstance(message, str) else message
+        # Look up every player first, so an unknown ID sends nothing
+        senders = [self.get_sender(p_id) for p_id in player_ids]
+        for sender in senders:
+            sender.send(payload)
 
     def notify_one(self, player_id, message):
         '''
@@ -111,16 +164,76 @@ class GameStateManager:
         the caller if they are needed.
 
         player_id: int - The ID of the player.
-        message: str - A message to send to the player.
+        message: str|bytes - A message to send to the player. Bytes are
+                             sent as they are.
         '''
-        conn = self.players[player_id][self.p_conn_key]
-        conn.send(message.encode())
+        if isinstance(message, str):
+            message = message.encode()
+        self.get_sender(player_id).send(message)
+
+    def get_sender(self, player_id):
+        '''
+        Returns the SendWorker for the given player. Raises a KeyError if the
+        player is not in the game.
+
+        player_id: int - The ID of the player.
+        '''
+        if not self.is_player(player_id):
+            raise KeyError('player id not found')
+        return self.player_senders[player_id - 1]
+
+    def close(self):
+        '''
+        Sends any messages still queued for the players in the game, then
+        stops their senders. Call before the server exits.
+        '''
+        for sender in self.active_senders:
+            sender.close(wait=True)
+
+    def __del__(self):
+        '''
+        Stops the senders of a manager that is dropped without being closed,
+        so their threads do not pile up.
+        '''
+        for sender in getattr(self, 'active_senders', ()):
+            sender.close()
 
     def get_curr_num_players(self):
         '''
         Returns the number of players in the game currently.
         '''
-        return len(self.players)
+        return self.active_mask.bit_count()
+
+    def get_player_ids(self):
+        '''
+        Returns a list of the IDs of the players in the game currently, in the
+        order they joined.
+        '''
+        return self.ids_in_mask(self.active_mask)
+
+    def get_in_play_ids(self):
+        '''
+        Returns a list of the IDs of the players in the game who have not
+        folded, in the order they joined.
+        '''
+        return self.ids_in_mask(self.active_mask & ~self.folded_mask)
+
+    def ids_in_mask(self, mask):
+        '''
+        Returns a list of the player IDs whose bits are set in the given mask.
+
+        mask: int - A bit field with bit (player ID - 1) set for each player
+        '''
+        return [i + 1 for i in range(self.cfg.num_players) if (mask >> i) & 1]
+
+    def is_player(self, player_id):
+        '''
+        Returns True if the player with the given ID is in the game.
+
+        player_id: int - The ID of the player.
+        '''
+        return 0 < player_id <= self.cfg.num_players and bool(
+            (self.active_mask >> (player_id - 1)) & 1)
 
     def get_player_conn(self, player_id):
         '''
@@ -128,7 +241,15 @@ class GameStateManager:
 
         player_id: int - The ID of the player.
         '''
-        return self.players[player_id][self.p_conn_key]
+        return self.player_conns[player_id - 1]
+
+    def get_player_name(self, player_id):
+        '''
+        Gets the name of a specific player.
+
+        player_id: int - The ID of the player.
+        '''
+        return self.player_names[player_id - 1]
 
     def set_name(self, player_id, name):
         '''
@@ -138,11 +259,11 @@ class GameStateManager:
         name: string - The player’s name.
         '''
         # Ensure this player is in the game
-        if player_id not in self.players:
+        if not self.is_player(player_id):
             raise KeyError('player id not found')
 
         # Set the name
-        self.players[player_id][self.p_name_key] = name
+        self.player_names[player_id - 1] = name
 
     def bet_info(self, player_id):
         '''
@@ -153,51 +274,79 @@ class GameStateManager:
 
         player_id: int - The ID of the player.
         '''
-        pool_amt = self.bets.get_pool_amt()
-        max_bet = self.bets.get_max_bet()[0]  # Don't need the player list
-        curr_bet = self.bets.get_player_bet(player_id)
-
-        return (pool_amt, max_bet, curr_bet)
+        bets = self.bets
+        return (bets.pool_total, bets.current_max, bets.get_player_bet(player_id))
 
     def increment_turn(self):
         '''
         Moves turn to the next player. Goes by the order players joined the game.
         Ignores any players who have folded or left the game.
         '''
-        num_folded = len(self.folded_ids)
-        num_left = len(self.left_ids)
-        num_out = num_folded + num_left
-        if self.num_players - num_out < 2:
-            # Turn would never change
-            return
+        # 0 means fewer than two players can take a turn, so it never changes
+        turn = self.next_turn[self.turn_id - 1]
+        if turn:
+            self.turn_id = turn
 
-        # For readability
-        turn = self.turn_id
+    def link_turn_order(self):
+        '''
+        Works out who plays after each player ID, skipping players who have
+        folded or left the game. Needs to be called whenever one of those
+        changes, so increment_turn is a single lookup.
+        '''
+        ids = self.get_in_play_ids()
+        if len(ids) < 2:
+            self.next_turn = [0] * self.cfg.num_players
+            return
 
-        # Increment until valid turn found
-        turn = (turn + 1) % self.num_players
-        while (turn in self.folded_ids) or (turn in self.left_ids):
-            turn = (turn + 1) % self.num_players
-        
-        # Set new turn
-        self.turn_id = turn
+        # Every slot gets a next player, so a turn held by someone who has
+        # just folded or left still moves on to the right player
+        next_turn = []
+        for p_id in range(1, self.cfg.num_players + 1):
+            later = [i for i in ids if i > p_id]
+            next_turn.append(later[0] if later else ids[0])
+        self.next_turn = next_turn
 
     def leave(self, player_id):
         '''
         Removes the given player from the game, if the player exists. Notify all players.
-        Returns the player value. Raises a KeyError if the player is not found.
+        Returns the player value as an (address_tup, name, connection) tuple.
+        Raises a KeyError if the player is not found.
 
         player_id: int - The ID of the player.
         '''
-        self.left_ids.add(player_id)
-        player = self.players[player_id]
-        del self.players[player_id]
+        if not self.is_player(player_id):
+            raise KeyError('player id not found')
+
+        idx = player_id - 1
+        player = (self.player_addrs[idx], self.player_names[idx],
+                  self.player_conns[idx])
+
+        self.player_addrs[idx] = None
+        self.player_names[idx] = None
+        self.player_conns[idx] = None
+        self.player_senders[idx].close()
+        self.player_senders[idx] = None
+        self.active_mask &= ~(1 << idx)
+        self.active_senders = tuple(
+            sender for sender in self.player_senders if sender is not None)
+        self.bets.drop_player(player_id)
+        self.link_turn_order()
         self.remove_hand(player_id)
         return player  # ID is already known, as it was passed in
 
     def remove_hand(self, player_id):
-        if self.final_hands:
-            del self.final_hands[player_id]
+        hand = self.final_hands[player_id - 1]
+        if hand is not None:
+            self.hand_pool.append(hand)
+        self.final_hands[player_id - 1] = None
+        self.hand_keys[player_id - 1] = 0
+        self.hand_features[player_id - 1] = None
+
+    def get_hand_ids(self):
+        '''
+        Returns a list of the IDs of the players who have a hand stored.
+        '''
+        return [i for i, hand in enumerate(self.final_hands, 1) if hand is not None]
 
     def bet_raise(self, player_id, amt):
         '''
@@ -208,8 +357,7 @@ class GameStateManager:
         amt: int - The amount to raise.
         '''
         # Need to make sure raise is on top of the max bet so far
-        _, max_bet, curr_bet = self.bet_info(player_id)
-        call_amt = max_bet - curr_bet
+        call_amt = self.bets.get_call_amount(player_id)
         total_bet = call_amt + amt
 
         # Now bet the total.
@@ -223,8 +371,7 @@ class GameStateManager:
 
         player_id: int - The ID of the player.
         '''
-        _, max_bet, curr_bet = self.bet_info(player_id)
-        call_amt = max_bet - curr_bet
+        call_amt = self.bets.get_call_amount(player_id)
 
         self.bets.add_bet(player_id, call_amt)
 
@@ -245,7 +392,9 @@ class GameStateManager:
 
         player_id: int - The ID of the player.
         '''
-        self.folded_ids.add(player_id)
+        self.folded_mask |= 1 << (player_id - 1)
+        self.bets.drop_player(player_id)
+        self.link_turn_order()
         self.remove_hand(player_id)
 
     def is_betting_over(self):
@@ -260,38 +409,46 @@ class GameStateManager:
         has been won: (betting_over, hand_won)
         '''
         # The above description is just a suggestion
-        cur_plays_num = len(self.players)
-        if cur_plays_num - len(self.folded_ids) < 1:
+        # BetInfo counts the bets of the players still in the hand, so this
+        # does not need to look at each player
+        bets = self.bets
+        if bets.num_in_play < 1:
             raise GameFullError(
                 "There is no one in the game")
 
-        if cur_plays_num - len(self.folded_ids) == 1:
+        if bets.num_in_play == 1:
             return (True, True)
 
-        cur_bets = -1
-        for p_id in self.players:
-            if p_id in self.folded_ids:
-                continue
-            if cur_bets == -1:
-                cur_bets = self.bets.get_player_bet(p_id)
-            elif cur_bets != self.bets.get_player_bet(p_id):
-                return (False, False)
-        return (True, False)
+        if len(bets.bet_counts) == 1:
+            return (True, False)
+        return (False, False)
 
     def get_cards(self, num_cards):
         '''
         Gets and removes the given number of cards from the game deck. Returns
         cards in a list.
         '''
-        if num_cards < 0 or num_cards > cards.NUM_CARDS_IN_HAND:
+        if not 0 <= num_cards <= cards.NUM_CARDS_IN_HAND:
             raise ValueError(
                 'invalid number of cards, must be within the range of cards in a hand')
 
-        card_list = []
-        for _ in range(num_cards):
-            card_list.append(self.deck.deal_card())
+        return self.deck.deal_cards(num_cards)
 
-        return card_list
+    def deal_hands(self, num_hands, hand_size):
+        '''
+        Gets and removes a hand of cards for each of the given number of
+        players from the game deck in one deal. Returns a list of card lists.
+
+        num_hands: int - The number of hands to deal.
+        hand_size: int - The number of cards in each hand.
+        '''
+        if not 0 < hand_size <= cards.NUM_CARDS_IN_HAND:
+            raise ValueError(
+                'invalid number of cards, must be within the range of cards in a hand')
+
+        card_list = self.deck.deal_cards(hand_size * num_hands)
+        return [card_list[i:i + hand_size]
+                for i in range(0, len(card_list), hand_size)]
 
     def store_hand(self, player_id, card_list):
         '''
@@ -302,27 +459,52 @@ class GameStateManager:
         '''
         # Cards not in Hand because it will be easier for server to pass to the
         # class; not sent as a hand, but individual cards. Creates the hand here.
-        num_cards = len(card_list)
-        hand = cards.Hand(num_cards)
-        for card in card_list:
-            hand.add_card(card)
-
-        self.final_hands[player_id] = hand
+        if self.hand_pool:
+            hand = self.hand_pool.pop()
+            hand.set_cards(card_list)
+        else:
+            hand = cards.Hand(len(card_list), card_list)
+        self.final_hands[player_id - 1] = hand
+        self.set_hand_key(player_id, hand.get_key())
 
     def add_cards(self, player_id, card_list):
+        add_card = self.final_hands[player_id - 1].add_card
+        key = self.hand_keys[player_id - 1]
         for card in card_list:
-            self.final_hands[player_id].add_card(card)
+            add_card(card)
+            key |= card.mask
+        self.set_hand_key(player_id, key)
 
     def delete_cards(self, player_id, card_list):
+        # Reject a player without a hand before doing any work
+        if not 0 < player_id <= self.cfg.num_players or \
+                self.final_hands[player_id - 1] is None:
+            raise KeyError('player has no hand')
+
+        # A card picked twice is only discarded once
+        card_list = list(dict.fromkeys(card_list))
         l = len(card_list)
         if l < 1:
             raise ValueError('must discard at least one card in the list')
         if l > cards.MAX_DISCARD:
             raise ValueError('cannot dicard more cards than allowed in a hand')
-        card_list.sort(reverse=True)
 
-        for card in card_list:
-            self.final_hands[player_id].remove_card(card)
+        removed = self.final_hands[player_id - 1].remove_cards(card_list)
+        key = self.hand_keys[player_id - 1]
+        for card in removed:
+            key &= ~card.mask
+        self.set_hand_key(player_id, key)
+
+    def set_hand_key(self, player_id, key):
+        '''
+        Stores the key of a player's hand along with its features, so they are
+        ready when the hands are evaluated. Called whenever a hand changes.
+
+        player_id: int - The ID of the player.
+        key: int - The Hand.get_key() value of the player's hand
+        '''
+        self.hand_keys[player_id - 1] = key
+        self.hand_features[player_id - 1] = self.get_features(player_id)
 
     def evaluate_hands(self):
         '''
@@ -331,182 +513,81 @@ class GameStateManager:
         '''
         # NOTE: Needs to empty the evaluated hands after, add back to deck,
         # and shuffle for next round.
-        for p_id in self.final_hands:
-            counts = self.get_counts(p_id)
-            self.card_val[p_id] = counts
-
-        win_score = [[] for _ in range(10)]
-        for p_id in self.final_hands:
-            win_score[self.score_player(p_id)].append(p_id)
-
-        # all people have royal flush would be the winner
-        if win_score[0]:
-            return win_score[0]
-
-        # people who have straight flush would be the winner. If more than one person, compare the highest rank
-        if win_score[1]:
-            if len(win_score[1]) < 2:
-                return win_score[1]
-            return self.rank_high(win_score[1])
-
-        # people who have four of a kind would be the winner. If more than one person, compare the highest rank
-        if win_score[2]:
-            if len(win_score[2]) < 2:
-                return win_score[2]
-            return self.rank_high(win_score[2])
-
-        # people who have full house would be the winner. If more than one person, compare the highest rank
-        if win_score[3]:
-            if len(win_score[3]) < 2:
-                return win_score[3]
-            return self.rank_high(win_score[3])
-
-        # people who have flush would be the winner. If more than one person, compare the highest rank
-        if win_score[4]:
-            if len(win_score[4]) < 2:
-                return win_score[4]
-            return self.rank_high(win_score[4])
-
-        # people who have straight would be the winner. If more than one person, compare the highest rank
-        if win_score[5]:
-            if len(win_score[5]) < 2:
-                return win_score[5]
-            return self.rank_high(win_score[5])
-
-        # people who have three of a kind would be the winner. If more than one person, compare the highest rank
-        if win_score[6]:
-            if len(win_score[6]) < 2:
-                return win_score[6]
-            return self.rank_high(win_score[6])
-
-        # people who have two pairs would be the winner. If more than one person, compare the highest rank
-        if win_score[7]:
-            if len(win_score[7]) < 2:
-                return win_score[7]
-            return self.rank_high(win_score[7])
-
-        # people who have pair would be the winner. If more than one person, compare the highest rank
-        if win_score[8]:
-            if len(win_score[8]) < 2:
-                return win_score[8]
-            return self.rank_high(win_score[8])
+        # Hand features are kept up to date as the hands change
+        hand_ids = self.get_hand_ids()
+
+        # Buckets are reused between rounds, so winners are returned as copies
+        win_score = self.win_score
+        for bucket in win_score:
+            bucket.clear()
+        hand_keys = self.hand_keys
+        hand_features = self.hand_features
+        score_cache = hand_eval.SCORE_CACHE
+        for p_id in hand_ids:
+            key = hand_keys[p_id - 1]
+            score = score_cache.get(key)
+            if score is None:
+                score = score_cache[key] = hand_eval.score(
+                    hand_features[p_id - 1])
+            win_score[score].append(p_id)
+
+        # The best non-empty bucket wins, from royal flush (0) down to one pair
+        # (8). If more than one person is in it, compare the highest rank
+        for bucket in win_score[:9]:
+            if bucket:
+                if len(bucket) < 2:
+                    return bucket[:]
+                return self.rank_high(bucket)
 
         return self.high_card()
 
+    # The evaluator in hand_eval only reads the features stored with the hand
     def score_player(self, player_id):
-        if self.is_royal_flush(player_id):
-            return 0
-        if self.is_straight_flush(player_id):
-            return 1
-        if self.has_four_of_kind(player_id):
-            return 2
-        if self.is_full_house(player_id):
-            return 3
-        if self.is_flush(player_id):
-            return 4
-        if self.is_straight(player_id):
-            return 5
-        if self.has_three_of_kind(player_id):
-            return 6
-        if self.has_two_pairs(player_id):
-            return 7
-        if self.has_one_pair(player_id):
-            return 8
-        return 9
+        return hand_eval.score(self.hand_features[player_id - 1])
 
     # This method sees if all the cards have the same suit
     def is_flush(self, player_id):
-        x = self.final_hands[player_id].hand[0].suit
-        for i in range(1, cards.NUM_CARDS_IN_HAND):
-            if self.final_hands[player_id].hand[i].suit != x:
-                return False
-        return True
+        return hand_eval.is_flush(self.hand_features[player_id - 1])
 
     # This method sees if the values are in sequence
     def is_straight(self, player_id):
-        for i, c in enumerate(self.card_val[player_id]):
-            if c == 0:
-                continue
-            if c > 2:
-                break
-            for j in range(i + 1, i + cards.NUM_CARDS_IN_HAND):
-                if j > 14 or self.card_val[player_id][j] == 0 :
-                    break
-                elif j == i + cards.NUM_CARDS_IN_HAND - 1:
-                    return True
-        return False
+        return hand_eval.is_straight(self.hand_features[player_id - 1])
 
     # This method sees if the cards are same suit and in sequence
     def is_straight_flush(self, player_id):
-        x = self.is_flush(player_id)
-        y = self.is_straight(player_id)
-        if x and y:
-            return True
-        return False
+        return hand_eval.is_straight_flush(self.hand_features[player_id - 1])
 
     # This method sees if the cards in the hand have the same suit and the values 10, 11, 12, 13, 14
     def is_royal_flush(self, player_id):
-        x = self.is_flush(player_id)
-        counts = self.card_val[player_id]
-        if x:
-            if counts[14] == 1 and counts[13] == 1 and counts[12] == 1 and counts[11] == 1 and counts[10] == 1:
-                return True
-        return False
+        return hand_eval.is_royal_flush(self.hand_features[player_id - 1])
 
     # This method sees if the hand has four cards with the same value
     def has_four_of_kind(self, player_id):
-        for _, c in enumerate(self.card_val[player_id]):
-            if c == 4:
-                return True
-        return False
+        return hand_eval.has_four_of_kind(self.hand_features[player_id - 1])
 
     # This method sees if the hand has three cards with the same value
     def has_three_of_kind(self, player_id):
-        for _, c in enumerate(self.card_val[player_id]):
-            if c == 3:
-                return True
-        return False
+        return hand_eval.has_three_of_kind(self.hand_features[player_id - 1])
 
     # This method sees if the hand has exactly two pairs
     def has_two_pairs(self, player_id):
-        x = 0
-        for _, c in enumerate(self.card_val[player_id]):
-            if c == 2:
-                x += 1
-            if c > 2:
-                x += c // 2
-        if x == 2:
-            return True
-        return False
+        return self.count_pairs(player_id) == 2
 
     # This method sees if the hand has exactly one pairs
     def has_one_pair(self, player_id):
-        x = 0
-        for _, c in enumerate(self.card_val[player_id]):
-            if c == 2:
-                x += 1
-            if c > 2:
-                x += c // 2
-        if x == 1:
-            return True
-        return False
+        return self.count_pairs(player_id) == 1
 
     # This method sees if the hand contains three cards with the same value and two other cards with the same value
     def is_full_house(self, player_id):
-        x = 0
-        y = 0
-        for _, c in enumerate(self.card_val[player_id]):
-            if c == 2:
-                x += 1
-            if c == 3:
-                y += 1
-        if x == 1 and y == 1:
-            return True
-        return False
+        return hand_eval.is_full_house(self.hand_features[player_id - 1])
+
+    # count the pairs in a hand, three of a kind holds one and four of a kind two
+    def count_pairs(self, player_id):
+        return hand_eval.count_pairs(self.hand_features[player_id - 1])
 
     # This method to compare the rank of the card, winner is who has the first highest rank
     def high_card(self):
-        return self.rank_high(list(self.final_hands.keys()))
+        return self.rank_high(self.get_hand_ids())
 
         # high_card = [[] for _ in range(max(self.card_val.keys()) + 1)]
         # for p_id, counts in self.card_val.items():
@@ -524,12 +605,13 @@ class GameStateManager:
         #         winner.append(p_id)
         # return winner
 
-    # count the amount of each rank values in hand, range from 2 to 14
+    # count the amount of each rank value in hand, packed 4 bits per rank
     def get_counts(self, player_id):
-        counts = [0] * 15
-        for i in range(cards.NUM_CARDS_IN_HAND):
-            counts[self.final_hands[player_id].hand[i].value] += 1
-        return counts
+        return hand_eval.count_ranks(self.hand_keys[player_id - 1])
+
+    # everything the predicates need to know about a hand, in a single pass
+    def get_features(self, player_id):
+        return hand_eval.get_features(self.hand_keys[player_id - 1])
 
     # find the winner who has the NO.1 highest rank
     def rank_high(self, candidates):
@@ -540,19 +622,12 @@ class GameStateManager:
         if len(candidates) == 1:
             return candidates
 
-        winner = []
-        cur_rank = -1
-        for i in candidates:
-            for j in range(14, -1, -1):
-                if self.card_val[i][j]:
-                    top = j
-                    if top > cur_rank:
-                        cur_rank = top
-                        winner = [i]
-                    elif top == cur_rank:
-                        winner.append(i)
-                    break
-        return winner
+        # Top rank of each candidate, then everyone who shares the best one
+        hand_features = self.hand_features
+        top_rank = hand_eval.top_rank
+        tops = [top_rank(hand_features[i - 1]) for i in candidates]
+        cur_rank = max(tops)
+        return [i for i, top in zip(candidates, tops) if top == cur_rank]
 
     def ack_ante(self, player_id):
         '''
@@ -561,16 +636,21 @@ class GameStateManager:
 
         player_id: int - The ID of the player. 
         '''
-        self.bets.add_bet(player_id, self.ante_amt)
+        self.bets.add_bet(player_id, self.cfg.ante_amt)
 
     def reset(self):
         '''
-        Reset the manager deck, final_hands, bets, fold_ids
+        Reset the manager deck, final_hands, bets, fold_ids. Objects are
+        reset in place and hands are kept for reuse in the next round.
         '''
-        self.deck = cards.Deck()
-        self.final_hands = dict()
+        self.deck.reset()
+        for p_id in self.get_hand_ids():
+            self.remove_hand(p_id)
         self.bets.reset()
-        self.folded_ids = set()
+        for p_id in self.ids_in_mask(self.folded_mask & self.active_mask):
+            self.bets.add_player(p_id)
+        self.folded_mask = 0
+        self.link_turn_order()
 
 
 class BetInfo:
@@ -578,21 +658,78 @@ class BetInfo:
     Keeps track of important data during a round of betting.
     '''
 
-    def __init__(self):
+    __slots__ = ('player_bets', 'pool_total', 'current_max', 'max_bet_ids',
+                 'in_play', 'num_in_play', 'bet_counts')
+
+    def __init__(self, num_players):
         '''
         Creates a BetInfo object.
+
+        num_players: int - Number of players in the game.
+        '''
+        self.player_bets = [0] * num_players  # indexed by player ID - 1
+
+        # Running totals, kept up to date by add_bet
+        self.pool_total = 0
+        self.current_max = 0
+        self.max_bet_ids = []  # IDs of the players who have bet current_max
+
+        # Players still in the hand, and how many of them have bet each amount
+        self.in_play = [False] * num_players
+        self.num_in_play = 0
+        self.bet_counts = Counter()
+
+    def add_player(self, player_id):
+        '''
+        Counts the given player as being in the hand, so their bet is compared
+        with the others. Does nothing if the player is already counted.
+
+        player_id: int - The ID of a player in the game.
+        '''
+        if not self.in_play[player_id - 1]:
+            self.in_play[player_id - 1] = True
+            self.num_in_play += 1
+            self.bet_counts[self.player_bets[player_id - 1]] += 1
+
+    def drop_player(self, player_id):
+        '''
+        Stops counting the given player as being in the hand, after they fold
+        or leave. Their bet stays in the pool. Does nothing if the player is
+        not counted.
+
+        player_id: int - The ID of a player in the game.
         '''
-        self.player_bets = dict()
+        if self.in_play[player_id - 1]:
+            self.in_play[player_id - 1] = False
+            self.num_in_play -= 1
+            self._uncount(self.player_bets[player_id - 1])
+
+    def _uncount(self, bet):
+        '''
+        Removes one player from the count of the given bet amount.
+        '''
+        bet_counts = self.bet_counts
+        bet_counts[bet] -= 1
+        if not bet_counts[bet]:
+            del bet_counts[bet]
 
     def add_bet(self, player_id, amt):
         '''
         Adds the given amount to the given player's bet total for a round.
         '''
-        # If player hasn't bet yet, need to add to the dict
-        if player_id not in self.player_bets:
-            self.player_bets[player_id] = amt
-        else:
-            self.player_bets[player_id] += amt
+        old_bet = self.player_bets[player_id - 1]
+        new_bet = old_bet + amt
+        self.player_bets[player_id - 1] = new_bet
+        if self.in_play[player_id - 1]:
+            self._uncount(old_bet)
+            self.bet_counts[new_bet] += 1
+
+        self.pool_total += amt
+        if new_bet > self.current_max:
+            self.current_max = new_bet
+            self.max_bet_ids = [player_id]
+        elif new_bet == self.current_max and player_id not in self.max_bet_ids:
+            self.max_bet_ids.append(player_id)
 
     def get_max_bet(self):
         '''
@@ -600,20 +737,16 @@ class BetInfo:
         the the bet amount with a list of player IDs who've bet that amount in a
         tuple. If no bets have been made a tuple of the form (0, []) is returned.
         '''
-        p_ids = []
-        max_bet = 0
-        d = self.player_bets
-
-        # Need to find max bet, then add players to list
-        for key in d:
-            if d[key] > max_bet:
-                max_bet = d[key]
+        return (self.current_max, list(self.max_bet_ids))
 
-        for key in d:
-            if d[key] == max_bet:
-                p_ids.append(key)
+    def get_call_amount(self, player_id):
+        '''
+        Returns how much the given player needs to bet to match the highest
+        bet so far this round.
 
-        return (max_bet, p_ids)
+        player_id: int - The ID of a player in the game.
+        '''
+        return self.current_max - self.player_bets[player_id - 1]
 
     def get_player_bet(self, player_id):
         '''
@@ -621,28 +754,88 @@ class BetInfo:
 
         player_id: int - The ID of a player in the game.
         '''
-        if player_id not in self.player_bets:
-            return 0
-
-        return self.player_bets[player_id]
+        return self.player_bets[player_id - 1]
 
     def get_pool_amt(self):
         '''
         Returns the total amount in the betting pool.
         '''
-        d = self.player_bets
+        return self.pool_total
 
-        total = 0
-        for key in d:
-            total += d[key]
+    def reset(self):
+        '''
+        Resets all betting info. Players who are counted stay counted.
+        '''
+        self.player_bets = [0] * len(self.player_bets)
+        self.pool_total = 0
+        self.current_max = 0
+        self.max_bet_ids = []
+        self.bet_counts.clear()
+        if self.num_in_play:
+            self.bet_counts[0] = self.num_in_play
 
-        return total
 
-    def reset(self):
+class SendWorker:
+    '''
+    Sends messages to one player's connection from a thread of its own, so a
+    slow client does not hold up the game. Messages go out in the order they
+    are given. If a send fails, the error is raised the next time the worker
+    is used.
+    '''
+
+    __slots__ = ('conn', 'outbox', 'thread', 'error')
+
+    def __init__(self, conn):
+        '''
+        Creates a SendWorker and starts its thread.
+
+        conn: socket - The connection to send on.
+        '''
+        self.conn = conn
+        self.outbox = queue.SimpleQueue()  # None tells the thread to stop
+        self.error = None  # OSError from a failed send, if any
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def send(self, payload):
         '''
-        Resets all betting info.
+        Queues the given bytes to be sent, without waiting for the send.
+        Raises a ConnectionError if an earlier send on this connection failed.
+
+        payload: bytes - The encoded message.
+        '''
+        if self.error is not None:
+            raise ConnectionError('could not send to player') from self.error
+        self.outbox.put(payload)
+
+    def run(self):
+        '''
+        Sends queued messages until the worker is closed or the connection
+        fails.
+        '''
+        get = self.outbox.get
+        sendall = self.conn.sendall
+        while True:
+            payload = get()
+            if payload is None:
+                return
+            try:
+                sendall(payload)
+            except OSError as e:
+                # Client has gone, nothing more can be sent. Kept for send to
+                # raise on the game thread.
+                self.error = e
+                return
+
+    def close(self, wait=False):
+        '''
+        Stops the worker once the messages already queued have been sent.
+
+        wait: bool - If True, block until they have been sent.
         '''
-        self.player_bets = dict()
+        self.outbox.put(None)
+        if wait:
+            self.thread.join()
 
 
 class GameFullError(Exception):
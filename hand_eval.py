@@ -0,0 +1,166 @@
+'''
+The `hand_eval` module contains the poker hand evaluator used by the game
+manager. It works on the integer keys from cards.Hand.get_key() and does no
+I/O, so it can be kept apart from the game state and the networking.
+'''
+
+from collections import namedtuple
+
+import cards
+
+# Hand.get_key() holds one 4-bit field per rank with a bit for each suit, so
+# the key is a set of cards in a single int.
+# These masks count or test the bits of every field at once.
+FIELD_LOW_BITS = 0x1111111111111
+FIELD_PAIR_BITS = 0x5555555555555
+FIELD_QUAD_BITS = 0x3333333333333
+STRAIGHT_FIELDS = 0x11111  # five consecutive ranks present
+WHEEL_FIELDS = (1 << 48) | 0x1111  # A-2-3-4-5, the ace plays low
+
+# What is worked out about a hand once, for the predicates to read: the
+# packed rank counts, whether it is a flush, the value of the top card of a
+# straight (0 if not a straight), the most cards of one rank, and the number
+# of ranks held exactly twice.
+HandFeatures = namedtuple(
+    'HandFeatures', 'counts flush straight_high max_count pair_count')
+
+# Hand scores from score, keyed by Hand.get_key(). A hand's score only
+# depends on its cards, so it is computed once per distinct hand.
+SCORE_CACHE = {}
+
+
+def rank_fields(counts):
+    '''
+    Returns the packed rank counts from count_ranks reduced to the lowest bit
+    of each rank field, set if the hand has that rank.
+    '''
+    return (counts | (counts >> 1) | (counts >> 2)) & FIELD_LOW_BITS
+
+
+def count_ranks(key):
+    '''
+    Counts the amount of each rank value in a hand with SWAR bit counting over
+    the hand key. The count for rank r (0 for '2' up to 12 for 'A') is packed
+    in bits 4r to 4r+3 of the result.
+
+    key: int - The Hand.get_key() value of a hand
+    '''
+    counts = key - ((key >> 1) & FIELD_PAIR_BITS)
+    return (counts & FIELD_QUAD_BITS) + ((counts >> 2) & FIELD_QUAD_BITS)
+
+
+def get_features(key):
+    '''
+    Returns the HandFeatures of a hand, everything the predicates need to
+    know about it, in a single pass.
+
+    key: int - The Hand.get_key() value of a hand
+    '''
+    # A flush is a full hand with bits from a single suit column of the key.
+    # The lowest set bit belongs to one of the cards, so gives the suit to
+    # check.
+    suit = ((key & -key).bit_length() - 1) % 4
+    flush = (key.bit_count() == cards.NUM_CARDS_IN_HAND and
+             not key & ~(FIELD_LOW_BITS << suit))
+
+    counts = count_ranks(key)
+    present = rank_fields(counts)
+    if present and present == (present & -present) * STRAIGHT_FIELDS:
+        straight_high = (present.bit_length() - 1) // 4 + 2
+    elif present == WHEEL_FIELDS:
+        straight_high = 5
+    else:
+        straight_high = 0
+
+    if (counts >> 2) & FIELD_LOW_BITS:
+        max_count = 4
+    elif counts & (counts >> 1) & FIELD_LOW_BITS:
+        max_count = 3
+    elif (counts >> 1) & FIELD_LOW_BITS:
+        max_count = 2
+    else:
+        max_count = 1
+    pair_count = ((counts >> 1) & ~counts & FIELD_LOW_BITS).bit_count()
+
+    return HandFeatures(counts, flush, straight_high, max_count, pair_count)
+
+
+def score(f):
+    '''
+    Scores a hand from its HandFeatures, from royal flush (0) down to high
+    card (9).
+
+    f: HandFeatures - The features of the hand
+    '''
+    if f.flush and f.straight_high == 14:
+        return 0
+    if f.flush and f.straight_high:
+        return 1
+    if f.max_count == 4:
+        return 2
+    if f.max_count == 3 and f.pair_count == 1:
+        return 3
+    if f.flush:
+        return 4
+    if f.straight_high:
+        return 5
+    if f.max_count == 3:
+        return 6
+    if f.pair_count == 2:
+        return 7
+    if f.pair_count == 1:
+        return 8
+    return 9
+
+
+def top_rank(f):
+    '''
+    Returns the value of the top card of a hand, used to break ties. The
+    highest non-empty rank field gives it, except in a straight where it is
+    the straight's high card (5 for A-2-3-4-5).
+
+    f: HandFeatures - The features of the hand
+    '''
+    return f.straight_high or (rank_fields(f.counts).bit_length() - 1) // 4 + 2
+
+
+# This sees if all the cards have the same suit
+def is_flush(f):
+    return f.flush
+
+
+# This sees if the values are in sequence
+def is_straight(f):
+    return f.straight_high != 0
+
+
+# This sees if the cards are same suit and in sequence
+def is_straight_flush(f):
+    return f.flush and f.straight_high != 0
+
+
+# This sees if the cards in the hand have the same suit and the values 10, 11, 12, 13, 14
+def is_royal_flush(f):
+    return f.flush and f.straight_high == 14
+
+
+# This sees if the hand has four cards with the same value
+def has_four_of_kind(f):
+    return f.max_count == 4
+
+
+# This sees if the hand has three cards with the same value
+def has_three_of_kind(f):
+    return f.max_count == 3
+
+
+# This sees if the hand contains three cards with the same value and two other cards with the same value
+def is_full_house(f):
+    return f.max_count == 3 and f.pair_count == 1
+
+
+# count the pairs in a hand, three of a kind holds one and four of a kind two
+def count_pairs(f):
+    if f.max_count > 2:
+        return f.pair_count + f.max_count // 2
+    return f.pair_count
@@ -258,18 +258,17 @@ class Player:
         '''
         Delete each of the cards in the list to this players hand. There must be 
         at lease one card and no more than MAX_DISCARD cards. Otherwise, we will 
-        throw a HandFullError
+        throw a HandFullError. A card picked twice is only discarded once.
         '''
+        card_list = list(dict.fromkeys(card_list))
         l = len(card_list)
 
         if l < 1:
             raise ValueError('must discard at least one card in the list')
         if l > cards.MAX_DISCARD:
             raise ValueError('cannot dicard more cards than allowed in a hand')
-        
-        card_list.sort(reverse = True)
-        for card in card_list:
-            self.hand.remove_card(card)
+
+        self.hand.remove_cards(card_list)
 
     def win_pool(self, amt):
         '''
@@ -452,9 +452,8 @@ def handle_card_trade(sock, player):
             return
         sock.send(discard_cards.encode()) # Discard card step is also required in manager
         discard_list = discard_cards.strip().split()
-        card_list = []
-        for card in discard_list:
-            card_list.append(int(card))
+        # The server discards a repeated card once, so only count it once
+        card_list = list(dict.fromkeys(int(card) for card in discard_list))
         player.delete_cards(card_list)
         resp = sock.recv(BUFF_SIZE).decode()
         print(resp)
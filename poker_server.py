@@ -11,10 +11,23 @@ import game_state_manager as gsm
 
 BUFF_SIZE = 512
 
+START = 'start'
+JOIN = 'join'
 BEGIN = 'begin'
 NOTIFY = 'notify'
 CARD_AMOUNT = 5
 DISCARD = 'discard'
+OVER = 'Over'
+WINNER = 'Winner'
+BETTING = 'Betting'
+START_ROUND = 'Start'
+
+# Fixed messages are encoded once and sent as bytes
+OVER_MSG = OVER.encode()
+WINNER_MSG = WINNER.encode()
+BETTING_MSG = BETTING.encode()
+BEGIN_MSG = BEGIN.encode()
+START_ROUND_MSG = START_ROUND.encode()
 
 def main(argv):
     # Parse command line arguments
@@ -38,6 +51,9 @@ def main(argv):
     print("Players joined. Starting game.")
     game_play(sock, manager)
 
+    # Let the last messages reach the players before exiting
+    manager.close()
+
 
 def game_play(sock, manager):
     '''
@@ -72,11 +88,11 @@ def game_play(sock, manager):
         manager.increment_turn()
         '''
         while True :
-            if p_id in manager.players:
+            if manager.is_player(p_id):
                 break
             else:
                 p_id += 1
-                p_id = int(p_id % manager.num_players)
+                p_id = int(p_id % manager.cfg.num_players)
             
         if p_id < init_player:
             init_player = p_id
@@ -88,10 +104,10 @@ def game_play(sock, manager):
         time.sleep(0.1)
 
         p_sequence = [] # The betting sequence 
-        for player_id in manager.players :
+        for player_id in manager.get_player_ids() :
             if player_id >= init_player :
                 p_sequence.append(player_id)
-        for player_id in manager.players :
+        for player_id in manager.get_player_ids() :
             if player_id < init_player :
                 p_sequence.append(player_id)
 
@@ -103,24 +119,22 @@ def game_play(sock, manager):
 
         # Check if has winner 
         is_over, has_won = manager.is_betting_over()
-        manager.notify_all("Over")
+        manager.notify_all(OVER_MSG)
         time.sleep(0.1)
 
         winner = []
 
         if has_won:
-            for p_id in manager.players:
-                if p_id not in manager.folded_ids:
-                    winner.append(p_id)
+            winner = manager.get_in_play_ids()
 
-            manager.notify_all("Winner")
+            manager.notify_all(WINNER_MSG)
             time.sleep(0.1)
 
             manager.notify_all("Player {} has won the game!".format(winner))
             time.sleep(0.1)
 
         else:
-            manager.notify_all("Betting")
+            manager.notify_all(BETTING_MSG)
             time.sleep(0.1)
 
             print("Swap cards in hand")
@@ -136,13 +150,11 @@ def game_play(sock, manager):
 
             # Check if has winner or evaluate the winner
             is_over, has_won = manager.is_betting_over()
-            manager.notify_all("Over")
+            manager.notify_all(OVER_MSG)
             time.sleep(0.1)
         
             if has_won:
-                for p_id in manager.players:
-                    if p_id not in manager.folded_ids:
-                        winner.append(p_id)
+                winner = manager.get_in_play_ids()
             else:
                 winner = handle_evaluate_winner(manager)
 
@@ -156,33 +168,33 @@ def game_play(sock, manager):
         win_amt = int(total_bets / count)
         win_remainder = int(total_bets % count)
 
-        for p_id in manager.players:
-            p_info = manager.players[p_id]
-            conn = p_info['conn']
-
+        losers = []
+        for p_id in manager.get_player_ids():
             if p_id in winner:
                 amt = win_amt + (1 if win_remainder > 0 else 0)
                 win_remainder -= 1; 
                 msg = "Win {}".format(amt)
                 print(msg)
-                conn.send(msg.encode())
+                manager.notify_one(p_id, msg)
                 time.sleep(0.1)
             else:
-                msg = "Lose"
-                print(msg)
-                conn.send(msg.encode())
+                losers.append(p_id)
+
+        # Everyone else gets the same message
+        if losers:
+            print("Lose {}".format(losers))
+            manager.notify_many(losers, "Lose")
 
         # Reset manager
         manager.reset()
 
         # Check if player want to play new game
         print("Check if players want to start new game")
-        next_round_players = list(manager.players.keys())
+        next_round_players = manager.get_player_ids()
         for p_id in next_round_players:
-            p_info = manager.players[p_id]
-            conn = p_info['conn']
+            conn = manager.get_player_conn(p_id)
             msg = "Do you want to start new game? Y/N:"
-            conn.send(msg.encode())
+            manager.notify_one(p_id, msg)
             msg = conn.recv(BUFF_SIZE).decode()
 
             if msg == 'N':
@@ -191,16 +203,12 @@ def game_play(sock, manager):
                 handle_leave(manager, [], p_id)
 
         # Notify players to start new game or wait for other players to join
-        for p_id in manager.players:
-            p_info = manager.players[p_id]
-            conn = p_info['conn']
-            if len(manager.players) == 1:
-                msg = 'Over'
-                conn.send(msg.encode())
+        for p_id in manager.get_player_ids():
+            if manager.get_curr_num_players() == 1:
+                manager.notify_one(p_id, OVER_MSG)
                 print("Game is over.")
-            elif len(manager.players) > 1:
-                msg = 'Start'
-                conn.send(msg.encode())
+            elif manager.get_curr_num_players() > 1:
+                manager.notify_one(p_id, START_ROUND_MSG)
                 print("New game to start {}".format(p_id))
 
 def wait_for_start(sock):
@@ -212,13 +220,12 @@ def wait_for_start(sock):
     '''
     while True:
         # Get connection
-        start = 'start'
         conn, addr = sock.accept()
         msg = conn.recv(BUFF_SIZE).decode()
         parts = msg.split()
 
         # Ensure start message
-        if parts[0] != start:
+        if parts[0] != START:
             err = 'err start waiting for start but received: ' + msg
             conn.send(err.encode())
             continue
@@ -245,7 +252,7 @@ def wait_for_start(sock):
 
         # Send ack to player
         ack = 'ack join ' + str(p_id) + ' ' + str(wallet_amt)
-        manager.get_player_conn(p_id).send(ack.encode())
+        manager.notify_one(p_id, ack)
 
         return manager  # breaks loop
 
@@ -258,16 +265,15 @@ def wait_for_players(sock, manager):
     sock: socket - server socket
     manager: GameStateManager - a game state manager
     '''
-    max_players = manager.num_players
+    max_players = manager.cfg.num_players
     while manager.get_curr_num_players() < max_players:
         # Get connection
-        join = 'join'
         conn, addr = sock.accept()
         msg = conn.recv(BUFF_SIZE).decode()
         parts = msg.split()
 
         # Ensure join message
-        if parts[0] != join:
+        if parts[0] != JOIN:
             err = 'err join waiting for join but got ' + msg
             conn.send(err.encode())
             continue
@@ -277,8 +283,8 @@ def wait_for_players(sock, manager):
         p_id = manager.join(conn, addr, name)
 
         # Send ack to player
-        ack = 'ack join ' + str(p_id) + ' ' + str(manager.wallet_amt)
-        manager.get_player_conn(p_id).send(ack.encode())
+        ack = 'ack join ' + str(p_id) + ' ' + str(manager.cfg.wallet_amt)
+        manager.notify_one(p_id, ack)
 
         # Sleeping here to ensure the ack message does not get concatenated
         # with the notify message below. Since TCP is a stream, need to build
@@ -294,7 +300,7 @@ def wait_for_players(sock, manager):
         manager.notify_all(msg)
         time.sleep(0.1)
 
-    manager.notify_all(BEGIN)
+    manager.notify_all(BEGIN_MSG)
     time.sleep(0.1)
 
 
@@ -302,19 +308,18 @@ def handle_antes(sock, manager):
     '''
     Call manager
     '''
-    # wallet_amt = manager.wallet_amt # need implementation
-    ante_amt = manager.ante_amt # need implementation
+    # wallet_amt = manager.cfg.wallet_amt # need implementation
+    ante_amt = manager.cfg.ante_amt # need implementation
     get_response = 0 # could be 1 
     msg = str(ante_amt) + " " + str(get_response)
     manager.notify_all(msg)
     time.sleep(0.1)
     
-    count = manager.num_players
+    count = manager.cfg.num_players
     # for id in range(1, count + 1):
-    for p_id in list(manager.players.keys()):
+    for p_id in manager.get_player_ids():
         print(p_id)
-        p_info = manager.players[p_id]
-        conn = p_info['conn']
+        conn = manager.get_player_conn(p_id)
         msg = conn.recv(BUFF_SIZE).decode()
         parts = msg.split()
 
@@ -334,20 +339,20 @@ def handle_deal(manager):
     Note: no fold is considered as no player can call fold at this time
     '''
     print("Start deal")
-    for p_id, value in manager.players.items() :
+    p_ids = manager.get_player_ids()
+    for p_id, cards in zip(p_ids, manager.deal_hands(len(p_ids), CARD_AMOUNT)) :
         print(p_id)
-        cards = manager.get_cards(CARD_AMOUNT)
         print(cards)
-        conn = value['conn']
+        conn = manager.get_player_conn(p_id)
         msg = ""
         for card in cards:
             msg += card.__repr__() + " "
             print(card.__str__())
-        conn.send(msg.encode())
+        manager.notify_one(p_id, msg)
         response = conn.recv(BUFF_SIZE).decode()
         if response == 'Received' :
             manager.store_hand(p_id, cards)
-            print("cards received to {}".format(value['name']))
+            print("cards received to {}".format(manager.get_player_name(p_id)))
 
     print("Card sent complete")
     
@@ -361,27 +366,27 @@ def handle_betting(manager, p_sequence):
     while not bet_over:
         p_remove = []
         for player_id in p_sequence :
-            p_info = manager.players[player_id]
-            conn = p_info['conn']
+            conn = manager.get_player_conn(player_id)
             #get bet info for this player
             pool_amt, max_amt, curr_amt = manager.bet_info(player_id)
             print(str(player_id) + " " + str(pool_amt) + " " + str(max_amt) + " " + str(curr_amt))
             message = str(max_amt) + " " + str(curr_amt) + " " + str(first_player)
             # print(message)
-            conn.send(message.encode())
+            manager.notify_one(player_id, message)
             first_player = False
             
             response = conn.recv(BUFF_SIZE).decode()
             print(response)
             parts = response.strip().split()
            
+            # Check, call and raise only update bets, so go straight to the manager
             if parts[0] == 'Check' :
-                handle_check(manager, player_id)
+                manager.bet_check(player_id)
             elif parts[0] == 'Call' :
-                handle_call(manager, player_id)
+                manager.bet_call(player_id)
             elif parts[0] == 'Raise' :
                 raise_amt = int(parts[2])
-                handle_raise(manager, player_id, raise_amt)
+                manager.bet_raise(player_id, raise_amt)
             elif parts[0] == 'Fold' : # should remove the hands from the final hand
                 handle_fold(manager, player_id, p_remove)
             elif  parts[0] == 'Leave' :
@@ -398,20 +403,6 @@ def handle_betting(manager, p_sequence):
     return p_sequence
 
 
-def handle_check(manager, player_id):
-    manager.bet_check(player_id)
-    # conn.send("OK".encode())
-
-
-def handle_call(manager, player_id):
-    manager.bet_call(player_id)
-    # conn.send("OK".encode())
-
-
-def handle_raise(manager, player_id, raise_amt):
-    manager.bet_raise(player_id, raise_amt)
-    # conn.send("OK".encode())
-
 def handle_fold(manager, player_id, p_remove):
     p_remove.append(player_id)
     manager.bet_fold(player_id)
@@ -434,9 +425,9 @@ def handle_card_trade(manager, p_sequence):
     3. Manager gives new card to player
     '''
     for p_id in p_sequence:
-        conn = manager.players[p_id]['conn']
+        conn = manager.get_player_conn(p_id)
         message = DISCARD + " Please discard cards"
-        conn.send(message.encode())
+        manager.notify_one(p_id, message)
         resp = conn.recv(BUFF_SIZE).decode()
         if resp == "N":
             continue
@@ -447,7 +438,7 @@ def handle_card_trade(manager, p_sequence):
         for card in discard_list:
             card_list.append(int(card))
         manager.delete_cards(p_id, card_list)
-        conn.send("OK".encode())
+        manager.notify_one(p_id, "OK")
         resp = conn.recv(BUFF_SIZE).decode()
         num_change = int(resp)
         cards = manager.get_cards(num_change)
@@ -456,11 +447,11 @@ def handle_card_trade(manager, p_sequence):
         for card in cards:
             msg += card.__repr__() + " "
         print(msg)
-        conn.send(msg.encode())
+        manager.notify_one(p_id, msg)
         response = conn.recv(BUFF_SIZE).decode()
         if response == 'Received' :
             manager.add_cards(p_id, cards)
-            print("cards received to {}".format(manager.players[p_id]['name']))
+            print("cards received to {}".format(manager.get_player_name(p_id)))
     print("Card sent complete")
 
 def handle_evaluate_winner(manager):
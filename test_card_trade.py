@@ -0,0 +1,133 @@
+'''
+Tests for swapping cards between the server and a client over a socket.
+'''
+
+import contextlib
+import io
+import socket
+import threading
+import unittest
+from unittest import mock
+
+import cards
+import game_state_manager as gsm
+import player
+import poker_client
+import poker_server
+
+
+class CardTradeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server_conn, self.client_conn = socket.socketpair()
+        self.server_conn.settimeout(5)
+        self.client_conn.settimeout(5)
+        self.manager = gsm.GameStateManager(2, 100, 5)
+        self.manager.join(self.server_conn, ('localhost', 0), 'a')
+
+        hand = self.manager.get_cards(cards.NUM_CARDS_IN_HAND)
+        self.manager.store_hand(1, hand)
+        self.player = player.Player(100, 1, 'a')
+        self.player.add_cards(hand)
+
+    def tearDown(self):
+        self.server_conn.close()
+        self.client_conn.close()
+
+    def trade(self, discard):
+        '''
+        Runs the server and client sides of a card trade, with the client
+        choosing to discard the given cards.
+        '''
+        errors = []
+
+        def serve():
+            try:
+                poker_server.handle_card_trade(self.manager, [1])
+            except Exception as e:
+                errors.append(e)
+
+        server = threading.Thread(target=serve)
+        with contextlib.redirect_stdout(io.StringIO()):
+            server.start()
+            with mock.patch('builtins.input', side_effect=['Y', discard]):
+                poker_client.handle_card_trade(self.client_conn, self.player)
+            server.join(5)
+
+        self.assertFalse(server.is_alive())
+        self.assertEqual(errors, [])
+
+    def test_repeated_discard(self):
+        kept = [repr(c) for i, c in enumerate(self.player.hand.hand, 1)
+                if i != 1]
+        self.trade('1 1')
+
+        server_hand = self.manager.final_hands[0].hand
+        client_hand = self.player.hand.hand
+        self.assertEqual(len(client_hand), cards.NUM_CARDS_IN_HAND)
+        self.assertEqual([repr(c) for c in server_hand],
+                         [repr(c) for c in client_hand])
+        self.assertEqual([repr(c) for c in client_hand[:4]], kept)
+        self.assertEqual(self.manager.hand_keys[0],
+                         self.manager.final_hands[0].get_key())
+
+
+class RemoveCardsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cards = cards.Deck().deal_cards(cards.NUM_CARDS_IN_HAND)
+        self.hand = cards.Hand(cards.NUM_CARDS_IN_HAND, self.cards)
+
+    def test_removes_in_one_pass(self):
+        ids = [4, 1]
+        removed = self.hand.remove_cards(ids)
+        self.assertEqual(removed, [self.cards[0], self.cards[3]])
+        self.assertEqual(self.hand.hand,
+                         [self.cards[1], self.cards[2], self.cards[4]])
+        self.assertEqual(ids, [4, 1])
+
+    def test_repeated_id_removed_once(self):
+        self.assertEqual(self.hand.remove_cards([2, 2]), [self.cards[1]])
+        self.assertEqual(len(self.hand.hand), cards.NUM_CARDS_IN_HAND - 1)
+
+    def test_invalid_id(self):
+        for card_id in (0, cards.NUM_CARDS_IN_HAND + 1):
+            with self.assertRaises(ValueError):
+                self.hand.remove_cards([card_id])
+
+
+
+class DealCardsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.deck = cards.Deck()
+
+    def test_deals_from_the_top(self):
+        top = self.deck.deck[-3:]
+        self.assertEqual(self.deck.deal_cards(3), top)
+        self.assertEqual(len(self.deck.deck), 49)
+
+    def test_zero_cards(self):
+        self.assertEqual(self.deck.deal_cards(0), [])
+        self.assertEqual(len(self.deck.deck), 52)
+
+    def test_negative_cards(self):
+        with self.assertRaises(ValueError):
+            self.deck.deal_cards(-1)
+        self.assertEqual(len(self.deck.deck), 52)
+
+    def test_too_many_cards(self):
+        with self.assertRaises(cards.DeckEmptyError):
+            self.deck.deal_cards(53)
+
+    def test_deal_hands_rejects_bad_sizes(self):
+        manager = gsm.GameStateManager(2, 100, 5)
+        with self.assertRaises(ValueError):
+            manager.deal_hands(2, -1)
+        with self.assertRaises(ValueError):
+            manager.deal_hands(-1, cards.NUM_CARDS_IN_HAND)
+        self.assertEqual(len(manager.deck.deck), 52)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,314 @@
+'''
+Tests for the GameStateManager, its message senders and the hand evaluator.
+'''
+
+import threading
+import time
+import unittest
+
+import cards
+import game_state_manager as gsm
+import hand_eval
+
+
+def hand_key(*card_reprs):
+    '''
+    Returns the Hand.get_key() value for cards given as 'SR' strings.
+    '''
+    return cards.Hand(len(card_reprs),
+                      [cards.Card(r[0], r[1:]) for r in card_reprs]).get_key()
+
+
+class FakeConn:
+    '''
+    Stands in for a client socket, keeping what is sent to it.
+    '''
+
+    def __init__(self):
+        self.sent = []
+
+    def sendall(self, payload):
+        self.sent.append(payload)
+
+
+class BrokenConn:
+    '''
+    A client socket whose peer has gone away.
+    '''
+
+    def sendall(self, payload):
+        raise BrokenPipeError('peer closed')
+
+
+class SenderTest(unittest.TestCase):
+
+    def test_dropped_managers_stop_their_threads(self):
+        before = threading.active_count()
+        for _ in range(500):
+            manager = gsm.GameStateManager(5, 100, 5)
+            for _ in range(5):
+                manager.join(FakeConn(), ('localhost', 0), 'p')
+            manager.notify_all('hello')
+        del manager
+
+        deadline = time.monotonic() + 5
+        while threading.active_count() > before and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertLessEqual(threading.active_count(), before)
+
+    def test_send_error_raised_on_next_use(self):
+        manager = gsm.GameStateManager(2, 100, 5)
+        manager.join(BrokenConn(), ('localhost', 0), 'a')
+        manager.notify_one(1, 'first')
+        manager.get_sender(1).thread.join(5)
+
+        with self.assertRaises(ConnectionError) as cm:
+            manager.notify_one(1, 'second')
+        self.assertIsInstance(cm.exception.__cause__, BrokenPipeError)
+        with self.assertRaises(OSError):
+            manager.notify_all('third')
+
+    def test_notify_departed_player(self):
+        manager = gsm.GameStateManager(2, 100, 5)
+        conns = [FakeConn(), FakeConn()]
+        for conn in conns:
+            manager.join(conn, ('localhost', 0), 'p')
+        manager.leave(2)
+
+        with self.assertRaises(KeyError):
+            manager.notify_one(2, 'hello')
+        with self.assertRaises(KeyError):
+            manager.notify_many([1, 2], 'hello')
+        with self.assertRaises(KeyError):
+            manager.notify_one(3, 'hello')
+
+        manager.notify_all('bye')
+        manager.close()
+        self.assertEqual(conns[0].sent, [b'bye'])
+        self.assertEqual(conns[1].sent, [])
+
+
+class BettingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = gsm.GameStateManager(3, 100, 5)
+        for name in ('a', 'b', 'c'):
+            self.manager.join(FakeConn(), ('localhost', 0), name)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def assertCounts(self, num_in_play, bet_counts):
+        bets = self.manager.bets
+        self.assertEqual(bets.num_in_play, num_in_play)
+        self.assertEqual(dict(bets.bet_counts), bet_counts)
+
+    def test_matched_bets_end_betting(self):
+        self.assertCounts(3, {0: 3})
+        self.assertEqual(self.manager.is_betting_over(), (True, False))
+        self.manager.bet_raise(1, 10)
+        self.assertCounts(3, {10: 1, 0: 2})
+        self.assertEqual(self.manager.is_betting_over(), (False, False))
+        self.manager.bet_call(2)
+        self.manager.bet_call(3)
+        self.assertCounts(3, {10: 3})
+        self.assertEqual(self.manager.is_betting_over(), (True, False))
+
+    def test_raise_after_call(self):
+        self.manager.bet_raise(1, 10)
+        self.manager.bet_call(2)
+        self.manager.bet_raise(2, 5)
+        self.assertCounts(3, {10: 1, 15: 1, 0: 1})
+        self.manager.bet_call(1)
+        self.manager.bet_call(3)
+        self.assertCounts(3, {15: 3})
+        self.assertEqual(self.manager.is_betting_over(), (True, False))
+
+    def test_fold(self):
+        self.manager.bet_raise(1, 10)
+        self.manager.bet_call(2)
+        self.manager.bet_fold(3)
+        self.assertCounts(2, {10: 2})
+        self.assertEqual(self.manager.is_betting_over(), (True, False))
+        self.manager.bet_fold(2)
+        self.assertCounts(1, {10: 1})
+        self.assertEqual(self.manager.is_betting_over(), (True, True))
+
+    def test_leave(self):
+        self.manager.bet_raise(1, 10)
+        self.manager.bet_call(2)
+        self.manager.leave(3)
+        self.assertCounts(2, {10: 2})
+        self.assertEqual(self.manager.is_betting_over(), (True, False))
+        self.assertEqual(self.manager.bets.get_pool_amt(), 20)
+
+    def test_fold_then_leave(self):
+        self.manager.bet_raise(1, 10)
+        self.manager.bet_fold(2)
+        self.manager.leave(2)
+        self.assertCounts(2, {10: 1, 0: 1})
+        self.assertEqual(self.manager.is_betting_over(), (False, False))
+        self.manager.bet_fold(3)
+        self.assertEqual(self.manager.is_betting_over(), (True, True))
+
+    def test_no_one_left(self):
+        for p_id in (1, 2, 3):
+            self.manager.bet_fold(p_id)
+        with self.assertRaises(gsm.GameFullError):
+            self.manager.is_betting_over()
+
+    def test_reset_counts_folded_players_again(self):
+        self.manager.bet_raise(1, 10)
+        self.manager.bet_fold(2)
+        self.manager.bet_fold(3)
+        self.manager.leave(3)
+        self.manager.reset()
+        self.assertCounts(2, {0: 2})
+        self.assertEqual(self.manager.get_in_play_ids(), [1, 2])
+        self.manager.bet_raise(2, 5)
+        self.assertEqual(self.manager.is_betting_over(), (False, False))
+
+
+class TurnOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = gsm.GameStateManager(4, 100, 5)
+        for name in ('a', 'b', 'c', 'd'):
+            self.manager.join(FakeConn(), ('localhost', 0), name)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def walk(self, steps):
+        '''
+        Moves the turn on the given number of times, returning each turn ID.
+        '''
+        turns = []
+        for _ in range(steps):
+            self.manager.increment_turn()
+            turns.append(self.manager.turn_id)
+        return turns
+
+    def test_wraps_from_last_player_to_first(self):
+        self.assertEqual(self.manager.next_turn, [2, 3, 4, 1])
+        self.assertEqual(self.walk(5), [2, 3, 4, 1, 2])
+
+    def test_leave_in_middle_of_ring(self):
+        self.manager.leave(2)
+        self.assertEqual(self.manager.next_turn, [3, 3, 4, 1])
+        self.assertEqual(self.walk(4), [3, 4, 1, 3])
+
+    def test_leave_at_end_of_ring(self):
+        self.manager.turn_id = 3
+        self.manager.leave(4)
+        self.assertEqual(self.manager.next_turn, [2, 3, 1, 1])
+        self.assertEqual(self.walk(4), [1, 2, 3, 1])
+
+    def test_turn_held_by_departed_player_moves_on(self):
+        self.manager.turn_id = 4
+        self.manager.leave(4)
+        self.assertEqual(self.walk(2), [1, 2])
+
+    def test_fold_skipped_until_reset(self):
+        self.manager.bet_fold(3)
+        self.assertEqual(self.walk(4), [2, 4, 1, 2])
+        self.manager.reset()
+        self.assertEqual(self.manager.next_turn, [2, 3, 4, 1])
+        self.assertEqual(self.walk(4), [3, 4, 1, 2])
+
+    def test_one_player_left_keeps_turn(self):
+        for p_id in (2, 3, 4):
+            self.manager.leave(p_id)
+        self.assertEqual(self.manager.next_turn, [0, 0, 0, 0])
+        self.assertEqual(self.walk(2), [1, 1])
+
+
+class DictKeyTest(unittest.TestCase):
+
+    def test_dicts_are_int_keyed(self):
+        manager = gsm.GameStateManager(3, 100, 5)
+        for name in ('a', 'b', 'c'):
+            manager.join(FakeConn(), ('localhost', 0), name)
+        manager.ack_ante(1)
+        manager.bet_raise(2, 10)
+        manager.bet_call(3)
+        for p_id in manager.get_player_ids():
+            manager.store_hand(p_id, manager.get_cards(cards.NUM_CARDS_IN_HAND))
+        manager.evaluate_hands()
+
+        dicts = []
+        for obj in (manager, manager.bets):
+            for attr in type(obj).__slots__:
+                value = getattr(obj, attr)
+                if isinstance(value, dict):
+                    dicts.append((attr, value))
+        dicts.append(('SCORE_CACHE', hand_eval.SCORE_CACHE))
+
+        self.assertTrue(any(d for _, d in dicts))
+        for attr, d in dicts:
+            self.assertTrue(all(isinstance(k, int) for k in d), attr)
+        manager.close()
+
+
+class HandEvalTest(unittest.TestCase):
+
+    def test_empty_hand_is_not_a_flush(self):
+        f = hand_eval.get_features(0)
+        self.assertFalse(f.flush)
+        self.assertEqual(hand_eval.score(f), 9)
+
+    def test_short_hand_is_not_a_flush(self):
+        f = hand_eval.get_features(hand_key('H2', 'H5', 'H9'))
+        self.assertFalse(f.flush)
+        self.assertEqual(hand_eval.score(f), 9)
+
+    def test_full_flush(self):
+        f = hand_eval.get_features(hand_key('H2', 'H5', 'H9', 'HJ', 'HK'))
+        self.assertTrue(f.flush)
+        self.assertEqual(hand_eval.score(f), 4)
+
+
+
+def showdown(*hands):
+    '''
+    Stores each hand, given as lists of 'SR' card strings, for its own player
+    and returns the IDs of the winners.
+    '''
+    manager = gsm.GameStateManager(len(hands), 100, 5)
+    for p_id, hand in enumerate(hands, 1):
+        manager.join(FakeConn(), ('localhost', 0), 'p')
+        manager.store_hand(p_id, [cards.Card(r[0], r[1:]) for r in hand])
+    winners = sorted(manager.evaluate_hands())
+    manager.close()
+    return winners
+
+
+class WheelTest(unittest.TestCase):
+    # A-2-3-4-5 is a straight with the ace low, so its high card is 5
+    WHEEL = ['HA', 'S2', 'D3', 'C4', 'H5']
+
+    def test_wheel_is_a_five_high_straight(self):
+        f = hand_eval.get_features(hand_key(*self.WHEEL))
+        self.assertEqual(f.straight_high, 5)
+        self.assertEqual(hand_eval.score(f), 5)
+        self.assertEqual(hand_eval.top_rank(f), 5)
+
+    def test_six_high_straight_beats_wheel(self):
+        six_high = ['S2', 'H3', 'C4', 'D5', 'S6']
+        self.assertEqual(showdown(self.WHEEL, six_high), [2])
+        self.assertEqual(showdown(six_high, self.WHEEL), [1])
+
+    def test_wheel_straight_flush_beats_flush(self):
+        wheel_flush = ['HA', 'H2', 'H3', 'H4', 'H5']
+        flush = ['SK', 'S9', 'S7', 'S4', 'S2']
+        f = hand_eval.get_features(hand_key(*wheel_flush))
+        self.assertEqual(hand_eval.score(f), 1)
+        self.assertEqual(showdown(flush, wheel_flush), [2])
+
+    def test_two_wheels_tie(self):
+        other_wheel = ['SA', 'C2', 'H3', 'D4', 'S5']
+        self.assertEqual(showdown(self.WHEEL, other_wheel), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()